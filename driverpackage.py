@@ -4,23 +4,73 @@
 Copyright 2020 Wirepath Home Systems, LLC. All Rights Reserved.
 """
 
-import argparse
-import codecs
-import datetime
+from __future__ import annotations
+
+# Heavyweight modules used on only some code paths (argparse,
+# concurrent.futures, shutil, zipfile, tempfile) are imported lazily inside
+# the functions that need them to keep CLI cold-start time down.
+import copy
+import functools
 import glob
 from io import BytesIO
 import os
-import shutil
+import re
+import shlex
 import subprocess
 import sys
-import tempfile
+import time
 from typing import Any, Optional
-import zipfile
 
 from lxml import etree
 
 import build_c4z as c4z
 
+## Pre-compiled XPath queries for driver XML lookups.
+## Compiling these once avoids re-parsing the XPath expression on every call.
+_CONFIG_XPATH = etree.XPath('config')
+_CONFIG_SCRIPT_XPATH = etree.XPath('./config/script')
+_CONFIG_DOCUMENTATION_XPATH = etree.XPath('./config/documentation')
+## Pre-compiled XPath selecting the text of every postpackage command in a manifest.
+## Selecting text nodes directly keeps the traversal and tag filtering in lxml's C core.
+_POSTPACKAGE_COMMAND_TEXT_XPATH = etree.XPath('./PostpackageCommands/PostpackageCommand/text()')
+## Pre-compiled XPath lookups for the driver XML children updated in place.
+_MODIFIED_XPATH = etree.XPath('modified')
+_VERSION_XPATH = etree.XPath('version')
+
+## Parser for manifest (c4zproj) files, which are read but never re-serialized.
+## Dropping ignorable whitespace text nodes shrinks the tree substantially for
+## hand-authored, pretty-printed manifests; entity resolution is disabled since
+## manifests have no legitimate use for it.  Driver XML keeps the default
+## parser because it is rewritten in place and blank-text removal would alter
+## its whitespace on the way back out.
+_MANIFEST_XML_PARSER = etree.XMLParser(
+    remove_blank_text=True,
+    collect_ids=False,
+    huge_tree=False,
+    resolve_entities=False)
+
+## Matches squishy manifest 'Module' directives of the form: Module 'name' 'file'.
+_SQUISHY_MODULE_PATTERN = re.compile(r"Module\s+['\"]([^'\"]+)['\"]\s+['\"]([^'\"]+)['\"]")
+## Matches squishy manifest 'Main' directives of the form: Main 'file'.
+_SQUISHY_MAIN_PATTERN = re.compile(r"Main\s+['\"]([^'\"]+)['\"]")
+
+## Translation table mapping both path separator styles to the native separator.
+## Built once so command normalization is a single C-level pass per string.
+_PATH_SEPARATOR_TRANSLATION_TABLE = str.maketrans({'\\': os.path.sep, '/': os.path.sep})
+
+## File extensions whose contents are already compressed or entropy-rich.
+## Deflating these burns CPU for almost no size benefit, so they are stored as-is.
+_ALREADY_COMPRESSED_FILE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.encrypted', '.squished'})
+
+## Directory containing this script file.
+## Resolved once at import since it never changes within a process and
+## realpath performs readlink/stat walks on every call.
+_THIS_SCRIPT_DIRECTORY_PATH = os.path.dirname(os.path.realpath(__file__))
+## Directory containing the pre-built executable when running as one; None otherwise.
+_EXECUTABLE_DIRECTORY_PATH = (
+    os.path.dirname(os.path.realpath(sys.executable))
+    if getattr(sys, 'frozen', False) else None)
+
 ## True if Lua files should be squished into a single file; false if not.
 ## See the following for more on Lua squishing:
 ## - https://matthewwild.co.uk/projects/squish/readme.html
@@ -29,22 +79,73 @@ global squishLua
 ## True if the driver being built is a C4I driver; false if not.
 global c4i
 
+## Picks the zip compression type for a driver package entry.
+## \param[in]   filename - Name of the file being added to the package.
+## \return  zipfile.ZIP_STORED for already-compressed content;
+##      zipfile.ZIP_DEFLATED for everything else.
+def _GetZipCompressionTypeForFile(filename: str) -> int:
+    import zipfile
+
+    unused_filename_without_extension, file_extension = os.path.splitext(filename)
+    file_already_compressed: bool = file_extension.lower() in _ALREADY_COMPRESSED_FILE_EXTENSIONS
+    return zipfile.ZIP_STORED if file_already_compressed else zipfile.ZIP_DEFLATED
+
+
 ## Packages Control4 .c4z driver files.
 class DriverPackager(object):
+    ## Fixed attribute slots.
+    ## The packager's attributes are read constantly during a build; slots keep
+    ## those lookups out of a per-instance dict.
+    __slots__ = (
+        '_arguments',
+        'verbose',
+        'source_directory_path',
+        'source_directory_absolute_path',
+        '_source_directory_join',
+        'destination_directory_path',
+        'manifest_xml_filename',
+        'bytes_io',
+        '_xml_parser',
+        '_xml_cache',
+        'unzip',
+        'allow_execute',
+        'update_modified',
+        'pretty_print',
+        'driver_version',
+        'compress_level',
+    )
+
     ## Initializes a driver packager according to supplied arguments.
     ## \param[in]   arguments - Arguments for configuring the driver packager.
     def __init__(self, arguments: argparse.Namespace):
         # INTIALIZE FIELDS.
+        ## The raw arguments this packager was configured from.
+        ## Kept so worker processes can construct equivalent packagers.
+        self._arguments: argparse.Namespace = arguments
         ## True if verbose output should be printed; false if not.
         self.verbose: bool = arguments.verbose
         ## Directory path where c4z input files are placed.
         self.source_directory_path: str = arguments.source_directory_path
+        ## Absolute form of the source directory path, resolved once.
+        self.source_directory_absolute_path: str = os.path.abspath(self.source_directory_path)
+        ## Joins filenames onto the source directory path.
+        ## Binding the invariant prefix once skips os.path.join re-inspecting
+        ## the same leading argument for every file a build touches.
+        self._source_directory_join = functools.partial(os.path.join, self.source_directory_path)
         ## Directory path where c4z output files are placed.
         self.destination_directory_path: str = arguments.destination_directory_path
         ## Optional filename of the manifest XML file.
         self.manifest_xml_filename: Optional[str] = arguments.manifest_xml_filename
         ## Raw bytes for the driver XML file.
         self.bytes_io = BytesIO()
+        ## Shared XML parser reused by every parse call.
+        ## Skipping xml:id collection avoids building an ID table no caller uses,
+        ## and the huge-tree safety limits are explicitly kept in place since no
+        ## legitimate driver or manifest XML comes anywhere near them.
+        self._xml_parser = etree.XMLParser(collect_ids=False, huge_tree=False)
+        ## Cache of parsed XML trees keyed by (filepath, modification time, parser).
+        ## Lets pipelines that rebuild from the same manifest or driver XML skip re-parsing.
+        self._xml_cache: dict[tuple[str, float, Any], Any] = {}
         
         ## True if the c4z should be unzipped in the destination location; false if not.
         self.unzip: bool = arguments.unzip
@@ -54,6 +155,22 @@ class DriverPackager(object):
         self.allow_execute: bool = arguments.allowexecute
         ## True to update the driver-modified date in XML; false to not.
         self.update_modified: bool = arguments.update_modified
+        ## True to pretty-print the final c4i document; false to write it compactly.
+        ## Pretty printing is purely diagnostic since Control4 consumes the file
+        ## programmatically, so it defaults to off.
+        self.pretty_print: bool = getattr(arguments, 'pretty', False)
+
+        ## DEFLATE level used when compressing the c4z (0-9).
+        ## Unzip workflows are fast-iteration development loops, so they default
+        ## to the fastest level; other builds keep zlib's default balance.
+        compress_level_argument: Optional[int] = getattr(arguments, 'compress_level', None)
+        compress_level_specified: bool = compress_level_argument is not None
+        if compress_level_specified:
+            self.compress_level: int = compress_level_argument
+        else:
+            FASTEST_COMPRESS_LEVEL: int = 1
+            DEFAULT_COMPRESS_LEVEL: int = 6
+            self.compress_level = FASTEST_COMPRESS_LEVEL if self.unzip else DEFAULT_COMPRESS_LEVEL
 
         ## Optional driver version to update the driver to.
         ## False if no driver version updates are needed.
@@ -80,9 +197,18 @@ class DriverPackager(object):
     ## \param[in]   root_directory_path - Path to the root directory of Lua files to squish.
     ## \throws  Exception - If an error occurs.
     def Squish(self, root_directory_path: str):
+        self.Log("Squishing Lua source...")
+
+        # TRY SQUISHING IN-PROCESS FIRST.
+        # Simple manifests can be combined directly in Python, skipping the
+        # LuaJIT process launch entirely; complex manifests fall through to
+        # the external squish tool below.
+        squished_in_process: bool = self.SquishInProcess(root_directory_path)
+        if squished_in_process:
+            return
+
         # SAVE IMPORTANT ENVIRONMENT INFORMATION BEFORE SQUISHING.
         # These will be overwritten below and need to be restored.
-        self.Log("Squishing Lua source...")
         original_path_environment_variable_value: str = os.environ['PATH']
         original_current_working_directory_path: str = os.getcwd()
         print('Saved Directory: '+original_current_working_directory_path)
@@ -96,25 +222,21 @@ class DriverPackager(object):
 
         # Depending on whether this packager is being run as a pre-built executable or not,
         # the next part of the command needs to be formed differently.
-        running_as_executable: bool = getattr(sys, 'frozen', False)
+        running_as_executable: bool = _EXECUTABLE_DIRECTORY_PATH is not None
         if running_as_executable:
             # LOOK FOR SQUISH IN THE SAME DIRECTORY AS THE EXECUTABLE.
-            executable_path: str = os.path.realpath(sys.executable)
-            executable_directory_path: str = os.path.dirname(executable_path)
-            squish_command_path: str = os.path.join(executable_directory_path, "squish")
+            squish_command_path: str = os.path.join(_EXECUTABLE_DIRECTORY_PATH, "squish")
             lua_squish_command.append(squish_command_path)
 
             # ENSURE FILES NEXT TO THE EXECUTABLE CAN BE FOUND.
-            os.environ['PATH'] = executable_directory_path + ";" + oldPath
+            os.environ['PATH'] = _EXECUTABLE_DIRECTORY_PATH + os.pathsep + original_path_environment_variable_value
         else:
             # LOOK FOR SQUISH IN THE SAME DIRECTORY AS THIS SCRIPT FILE.
-            current_filepath: str = os.path.realpath(__file__)
-            current_file_directory_path: str = os.path.dirname(current_filepath)
-            squish_command_path: str = os.path.join(current_file_directory_path, "squish")
+            squish_command_path: str = os.path.join(_THIS_SCRIPT_DIRECTORY_PATH, "squish")
             lua_squish_command.append(squish_command_path)
 
             # ENSURE FILES NEXT TO THIS SCRIPT CAN BE FOUND.
-            os.environ['PATH'] = current_file_directory_path + os.pathsep + oldPath
+            os.environ['PATH'] = _THIS_SCRIPT_DIRECTORY_PATH + os.pathsep + original_path_environment_variable_value
 
         # A few additional options are added to the command.
         # cmdLine.append('-q')
@@ -146,6 +268,109 @@ class DriverPackager(object):
             os.environ["PATH"] = original_path_environment_variable_value
             os.chdir(original_current_working_directory_path)
 
+    ## Squishes Lua files in-process, without launching the external squish tool.
+    ## Only simple squishy manifests consisting of Module/Main directives are
+    ## supported; anything more complex needs the real squish tool.
+    ## \param[in]   root_directory_path - Path to the root directory of Lua files to squish.
+    ## \return  True if the Lua files were squished in-process;
+    ##      false if the manifest requires the external squish tool.
+    def SquishInProcess(self, root_directory_path: str) -> bool:
+        import shutil
+
+        # READ THE SQUISHY MANIFEST.
+        squishy_manifest_filepath: str = os.path.join(root_directory_path, "squishy")
+        try:
+            with open(squishy_manifest_filepath, 'r', encoding='utf-8') as squishy_manifest_file:
+                squishy_manifest_lines: list[str] = squishy_manifest_file.read().splitlines()
+        except OSError:
+            # Without a readable manifest the external tool must decide what to do.
+            return False
+
+        # PARSE THE MANIFEST DIRECTIVES.
+        module_entries: list[tuple[str, str]] = []
+        main_lua_filename: Optional[str] = None
+        for squishy_manifest_line in squishy_manifest_lines:
+            # SKIP BLANK LINES AND LUA COMMENTS.
+            stripped_manifest_line: str = squishy_manifest_line.strip()
+            is_ignorable_line: bool = (not stripped_manifest_line) or stripped_manifest_line.startswith('--')
+            if is_ignorable_line:
+                continue
+
+            # CHECK FOR A MODULE DIRECTIVE.
+            module_directive_match = _SQUISHY_MODULE_PATTERN.match(stripped_manifest_line)
+            if module_directive_match:
+                MODULE_NAME_GROUP_INDEX: int = 1
+                MODULE_FILENAME_GROUP_INDEX: int = 2
+                module_entries.append((
+                    module_directive_match.group(MODULE_NAME_GROUP_INDEX),
+                    module_directive_match.group(MODULE_FILENAME_GROUP_INDEX)))
+                continue
+
+            # CHECK FOR A MAIN DIRECTIVE.
+            main_directive_match = _SQUISHY_MAIN_PATTERN.match(stripped_manifest_line)
+            if main_directive_match:
+                MAIN_FILENAME_GROUP_INDEX: int = 1
+                main_lua_filename = main_directive_match.group(MAIN_FILENAME_GROUP_INDEX)
+                continue
+
+            # Any other directive is beyond what in-process squishing handles.
+            return False
+
+        # The main chunk is required for a usable squished driver.
+        main_lua_filename_exists: bool = main_lua_filename is not None
+        if not main_lua_filename_exists:
+            return False
+
+        # COMBINE THE MODULES AND MAIN CHUNK INTO THE SQUISHED OUTPUT FILE.
+        squished_lua_filepath: str = os.path.join(root_directory_path, "driver.lua.squished")
+        COPY_BLOCK_SIZE_IN_BYTES: int = 64 * 1024
+        with open(squished_lua_filepath, 'w', encoding='utf-8') as squished_lua_file:
+            for module_name, module_lua_filename in module_entries:
+                # Each module is registered with the package loader the same way
+                # the squish tool does it, so require() calls keep working.
+                squished_lua_file.write(f"package.preload['{module_name}'] = (function (...)\n")
+                module_lua_filepath: str = os.path.join(root_directory_path, module_lua_filename)
+                with open(module_lua_filepath, 'r', encoding='utf-8') as module_lua_file:
+                    shutil.copyfileobj(module_lua_file, squished_lua_file, COPY_BLOCK_SIZE_IN_BYTES)
+                squished_lua_file.write("\nend)\n")
+
+            # The main chunk goes last so the modules above are registered before it runs.
+            main_lua_filepath: str = os.path.join(root_directory_path, main_lua_filename)
+            with open(main_lua_filepath, 'r', encoding='utf-8') as main_lua_file:
+                shutil.copyfileobj(main_lua_file, squished_lua_file, COPY_BLOCK_SIZE_IN_BYTES)
+
+        # INDICATE THE LUA FILES WERE SQUISHED IN-PROCESS.
+        return True
+
+    ## Parses an XML file, serving repeated loads of an unchanged file from a cache.
+    ## \param[in]   xml_filepath - Path to the XML file to load.
+    ## \param[in]   xml_parser - Optional parser to use instead of the default
+    ##      shared parser.  Part of the cache key, so the same file parsed with
+    ##      different parsers yields distinct cached trees.
+    ## \return  A parsed element tree for the file.  A deep copy of the cached tree
+    ##      is returned so callers may freely mutate the result.
+    def _LoadXmlFile(self, xml_filepath: str, xml_parser=None):
+        if xml_parser is None:
+            xml_parser = self._xml_parser
+
+        # CHECK FOR A CACHED TREE FOR THE CURRENT VERSION OF THE FILE.
+        # The modification time is part of the key, so on-disk edits (including
+        # this packager's own driver.xml rewrites) invalidate the entry naturally.
+        xml_cache_key: tuple[str, float, Any] = (xml_filepath, os.path.getmtime(xml_filepath), xml_parser)
+        cached_xml_tree = self._xml_cache.get(xml_cache_key)
+        if cached_xml_tree is not None:
+            # Copying the cached tree is much cheaper than re-parsing the file and
+            # keeps caller mutations from corrupting the cache.
+            return copy.deepcopy(cached_xml_tree)
+
+        # PARSE THE TREE AND CACHE A PRIVATE COPY.
+        # The fresh tree goes straight to the caller, so a first (or only) load
+        # pays no copy on the returned tree; the cache keeps its own copy so
+        # caller mutations cannot corrupt later hits.
+        parsed_xml_tree = etree.parse(xml_filepath, xml_parser)
+        self._xml_cache[xml_cache_key] = copy.deepcopy(parsed_xml_tree)
+        return parsed_xml_tree
+
     ## Creates a driver package from a manifest file.
     ## \param[in]   manifest_xml_filepath - The path to the manifest file.
     ## \return  A return code from trying to create the driver package.
@@ -153,7 +378,9 @@ class DriverPackager(object):
     def CreateFromManifest(self, manifest_xml_filepath: str) -> int:
         try:
             # READ THE ROOT NODE FROM THE MANIFEST XML FILE.
-            manifest_xml_tree = etree.parse(manifest_xml_filepath)
+            # The manifest-specific parser discards ignorable whitespace, which
+            # is safe here because the manifest is never written back to disk.
+            manifest_xml_tree = self._LoadXmlFile(manifest_xml_filepath, _MANIFEST_XML_PARSER)
             manifest_xml_root_element = manifest_xml_tree.getroot()
 
             try:
@@ -177,62 +404,118 @@ class DriverPackager(object):
             self.Log(f"DriverPackager: Invalid XML ({manifest_xml_filepath}): {exception}")
             return exception.code
 
+    ## Creates driver packages from multiple manifest files in parallel.
+    ## Each manifest produces its own output driver and touches a disjoint source
+    ## subtree, so the builds are fanned out across worker processes.
+    ## \param[in]   manifest_xml_filepaths - Paths to the manifest files to build.
+    ## \return  A return code per manifest, in the same order as the input paths.
+    ##      0 indicates success; any other value indicates failure.
+    def CreateFromManifests(self, manifest_xml_filepaths: list[str]) -> list[int]:
+        import concurrent.futures
+
+        # SEPARATE OUT C4I MANIFESTS, WHICH CANNOT BUILD CONCURRENTLY.
+        # The c4i path finds its squished Lua through the shared system temp
+        # directory, so concurrent c4i builds could pick up each other's
+        # working data.  They are built one at a time in this process instead.
+        parallel_build_indices: list[int] = []
+        sequential_build_indices: list[int] = []
+        for manifest_index, manifest_xml_filepath in enumerate(manifest_xml_filepaths):
+            if _ManifestIsForC4iDriver(manifest_xml_filepath):
+                sequential_build_indices.append(manifest_index)
+            else:
+                parallel_build_indices.append(manifest_index)
+
+        # BUILD THE REMAINING MANIFESTS IN WORKER PROCESSES.
+        # A fresh packager is constructed per worker because parsed XML trees
+        # held by this instance are not cheaply picklable.
+        SUCCESS_RETURN_CODE: int = 0
+        return_codes: list[int] = [SUCCESS_RETURN_CODE] * len(manifest_xml_filepaths)
+        if parallel_build_indices:
+            build_tasks = [(self._arguments, manifest_xml_filepaths[manifest_index])
+                           for manifest_index in parallel_build_indices]
+            with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                for manifest_index, return_code in zip(
+                        parallel_build_indices, executor.map(_BuildDriverFromManifest, build_tasks)):
+                    return_codes[manifest_index] = return_code
+
+        # BUILD THE C4I MANIFESTS SEQUENTIALLY.
+        for manifest_index in sequential_build_indices:
+            return_codes[manifest_index] = _BuildDriverFromManifest(
+                (self._arguments, manifest_xml_filepaths[manifest_index]))
+
+        return return_codes
+
     ## Gets the encrypted script filename from the driver XML file.
     ## \param[in]   driver_xml_filepath - Path to the driver XML file to read.
-    ## \return  The encrypted script filename.
+    ## \return  A tuple of the encrypted script filename and the parsed driver XML tree.
+    ##      The tree is returned so callers can reuse it without re-parsing the file.
     ## \throws  Exception - Thrown if the XML file is invalid.
-    def GetEncryptFilename(self, driver_xml_filepath: str) -> Optional[str]:
+    def GetEncryptFilename(self, driver_xml_filepath: str) -> tuple[Optional[str], Any]:
         try:
             # GET THE ROOT ELEMENT OF THE DRIVER XML.
-            driver_xml_tree = etree.parse(driver_xml_filepath)
+            driver_xml_tree = self._LoadXmlFile(driver_xml_filepath)
             driver_xml_root_element = driver_xml_tree.getroot()
-
-            # SEARCH FOR SCRIPT ENCRYPTION ELEMENTS.
-            c4z_script_file = None
-            script_elements = driver_xml_root_element.findall('./config/script')
-            for script_element in script_elements:
-                # CHECK THE ENCRYPTION FOR THE CURRENT SCRIPT.
-                c4z_script_encryption = script_element.attrib.get('encryption')
-                if c4z_script_encryption == '2':
-                    # Only use the newer encryption.
-                    if c4z.squishLua_:
-                        # If squishing is enabled, get the output file from the squish tool.
-                        c4z_script_file = c4z.GetSquishyOutputFile(self.source_directory_path)
-                    else:
-                        # Otherwise, get the file name from the script tag attribute.
-                        c4z_script_file = script_element.attrib.get('file')
-
-            # RETURN ANY SCRIPT ENCRYPT FILE IF FOUND.
-            return c4z_script_file
         except etree.ParseError as exception:
             raise Exception(
                 f"DriverPackager: Invalid XML ({driver_xml_filepath}): {exception}")
 
+        # SEARCH THE PARSED DRIVER XML FOR THE ENCRYPTED SCRIPT FILENAME.
+        c4z_script_file = self.GetEncryptFilenameFromRoot(driver_xml_root_element)
+        return c4z_script_file, driver_xml_tree
+
+    ## Gets the encrypted script filename from an already-parsed driver XML root element.
+    ## Callers that have the driver XML parsed already should prefer this variant
+    ## over \ref GetEncryptFilename to avoid re-parsing the same file.
+    ## \param[in]   driver_xml_root_element - The root element of the parsed driver XML.
+    ## \return  The encrypted script filename.
+    def GetEncryptFilenameFromRoot(self, driver_xml_root_element) -> Optional[str]:
+        # SEARCH FOR SCRIPT ENCRYPTION ELEMENTS.
+        c4z_script_file = None
+        script_elements = _CONFIG_SCRIPT_XPATH(driver_xml_root_element)
+        for script_element in script_elements:
+            # CHECK THE ENCRYPTION FOR THE CURRENT SCRIPT.
+            c4z_script_encryption = script_element.attrib.get('encryption')
+            if c4z_script_encryption == '2':
+                # Only use the newer encryption.
+                if c4z.squishLua_:
+                    # If squishing is enabled, get the output file from the squish tool.
+                    c4z_script_file = c4z.GetSquishyOutputFile(self.source_directory_path)
+                else:
+                    # Otherwise, get the file name from the script tag attribute.
+                    c4z_script_file = script_element.attrib.get('file')
+
+        # RETURN ANY SCRIPT ENCRYPT FILE IF FOUND.
+        return c4z_script_file
+
     ## Cleans up any temporary Lua driver file in the specified directory.
     ## If a temporary file exists, it will be copied to a permanent location.
     ## \param[in]   root_directory_path - Root directory in which to search for a temporary Lua driver file.
     def CleanupTemporaryLuaFile(self, root_directory_path: str):
         # CHECK IF EXECUTION IN A LUA COMMAND WINDOW WAS ALLOWED.
         if self.allow_execute:
+            # MOVE ANY TEMPORARY LUA FILE BACK TO ITS FINAL LOCATION.
+            # The rename is attempted directly instead of checking for the file
+            # first; a missing temporary file simply means there is nothing to
+            # restore, and probing beforehand would be racy anyway.
+            temporary_driver_lua_filepath: str = os.path.join(root_directory_path, "driver.lua.tmp")
+            final_driver_lua_filepath: str = os.path.join(root_directory_path, "driver.lua")
             try:
-                # CHECK IF A TEMPORARY LUA FILE EXISTS.
-                temporary_driver_lua_filepath: str = os.path.join(root_directory_path, "driver.lua.tmp")
-                temporary_driver_lua_file_exists: bool = os.path.exists(temporary_driver_lua_filepath)
-                if temporary_driver_lua_file_exists:
-                    # COPY THE TEMPORARY LUA FILE TO A FINAL LOCATION.
-                    final_driver_lua_filepath: str = os.path.join(root_directory_path, "driver.lua")
-                    shutil.copyfile(temporary_driver_lua_filepath, final_driver_lua_filepath)
-
-                    # REMOVE THE TEMPORARY LUA FILE.
-                    os.remove(temporary_driver_lua_filepath)
-            except Exception as exception:
-                self.Log("Unable to remove driver.lua.tmp file or file does not exist")
+                os.replace(temporary_driver_lua_filepath, final_driver_lua_filepath)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                self.Log("Unable to restore driver.lua from driver.lua.tmp")
 
     ## Parses XML to create a driver package for the specified directory.
     ## \param[in]   xml_root_element - The root XML element for the driver manifest.
     ## \param[in]   root_directory_path - Path of the root directory for the package to create.
-    ## \throws  Exception - Thrown if an error occurs.            
+    ## \throws  Exception - Thrown if an error occurs.
     def ParseXmlToCreatePackage(self, xml_root_element, root_directory_path: str):
+        import concurrent.futures
+        import shutil
+        import tempfile
+        import zipfile
+
         # VALIDATE THE ROOT XML ELEMENT.
         is_for_driver_element: bool = (xml_root_element.tag == 'Driver')
         if not is_for_driver_element:
@@ -247,7 +530,7 @@ class DriverPackager(object):
         # A driver name is required.
         driver_name = xml_root_element.attrib.get('name')
         driver_name_specified: bool = driver_name is not None
-        if driver_name_specified:
+        if not driver_name_specified:
             raise Exception("DriverPackager: Invalid XML: Missing tag 'name'")
 
         # CONFIGURE LUA SQUISHING.
@@ -272,7 +555,6 @@ class DriverPackager(object):
             # EXECUTE EACH PREPACKAGING COMMAND.
             for prepackage_command_xml_element in prepackage_command_xml_elements:
                 # VERIFY THE COMMAND XML IS VALID.
-                print(prepackage_command_xml_element.tag, prepackage_command_xml_element.text)
                 is_valid_prepackage_command_xml: bool = prepackage_command_xml_element.tag == 'PrepackageCommand'
                 if not is_valid_prepackage_command_xml:
                     self.Log(f"Invalid XML: Found tag '{prepackage_command_xml_element.tag}', should be 'PrepackageCommand'")
@@ -280,18 +562,26 @@ class DriverPackager(object):
 
                 # EXECUTE THE PREPACKAGING COMMAND.
                 # Commands should use the correct path separator for the current OS.
-                prepackage_command: str = prepackage_command_xml_element.text.replace("\\", os.path.sep)
-                prepackage_command = prepackage_command.replace("/", os.path.sep)
+                prepackage_command: str = prepackage_command_xml_element.text.translate(
+                    _PATH_SEPARATOR_TRANSLATION_TABLE)
+                # The command is run directly rather than through os.system, which
+                # would spawn an intermediate shell for every command and
+                # re-interpret any shell metacharacters in it.
+                prepackage_command_arguments: list[str] = shlex.split(prepackage_command, posix=(os.name != 'nt'))
+                completed_prepackage_command = subprocess.run(prepackage_command_arguments, check=False)
                 SUCCESS_RETURN_CODE: int = 0
-                prepackage_command_return_code: int = os.system(prepackage_command)
-                prepackage_command_succeeded: bool = (prepackage_command_return_code == SUCCESS_RETURN_CODE)
-                if prepackage_command_succeeded:
-                    raise Exception("Failed to execute prepackage command.")
+                prepackage_command_succeeded: bool = (completed_prepackage_command.returncode == SUCCESS_RETURN_CODE)
+                if not prepackage_command_succeeded:
+                    # Failing fast here skips the expensive squish and zip stages
+                    # of a build that is already known to be broken.
+                    raise Exception(
+                        f"DriverPackager: Prepackage command failed "
+                        f"(rc={completed_prepackage_command.returncode}): {prepackage_command}")
 
         # VERIFY THE MANIFEST XML HAS ITEMS.
         item_xml_elements = xml_root_element.find('Items')
         items_exist: bool = item_xml_elements is not None
-        if items_exist:
+        if not items_exist:
             raise Exception("DriverPackager: Invalid XML: Missing tag 'Items'")
 
         # ADD LUA EXECUTION ATTRIBUTES IF ENABLED.
@@ -299,43 +589,60 @@ class DriverPackager(object):
             # ENABLE EXECUTION IN A LUA COMMAND WINDOW FOR DEVELOPMENT DRIVERS.
             print("C4:AllowExecute(true) being added to file")
             # The original Lua driver file will be backed up to a temporary location.
+            # A rename is used rather than a copy since it is a metadata-only operation
+            # on the same filesystem and the original content is rewritten just below.
+            # replace (rather than rename) overwrites a stale backup left by a
+            # crashed build on every platform; rename raises on Windows if the
+            # temporary file already exists.
             original_lua_driver_filepath: str = os.path.join(root_directory_path, "driver.lua")
             temporary_lua_driver_filepath: str = os.path.join(root_directory_path, "driver.lua.tmp")
-            shutil.copyfile(original_lua_driver_filepath, temporary_lua_driver_filepath)
-            # New settings will be appended to the original Lua driver file.
-            with open(original_lua_driver_filepath, "a") as lua_driver_file:
+            os.replace(original_lua_driver_filepath, temporary_lua_driver_filepath)
+            # The original content plus the new settings are written back to the original path.
+            with open(temporary_lua_driver_filepath, "r") as temporary_lua_driver_file:
+                original_lua_driver_content: str = temporary_lua_driver_file.read()
+            with open(original_lua_driver_filepath, "w") as lua_driver_file:
+                lua_driver_file.write(original_lua_driver_content)
+
                 # ALLOW EXECUTION IN A LUA COMMAND WINDOW.
                 lua_driver_file.write("\nC4:AllowExecute(true)\n")
-                
+
                 # ENABLE DEVELOPMENT DRIVER FEATURES.
                 lua_driver_file.write("\ngIsDevelopmentVersionOfDriver = true\n")
 
         # PROCESS EACH ITEM FROM THE DRIVER MANIFEST.
-        # A c4z driver XML file is required to be found.        
+        # A c4z driver XML file is required to be found.
         c4z_driver_xml_found: bool = False
+        # The parsed driver XML tree is kept so later steps can reuse it without re-parsing.
+        driver_xml_tree = None
         # A c4z script file for encryption may also need to be tracked.
         c4z_script_file: str = ''
         # Specific directories and files for the c4z driver need to be tracked.
         c4z_directories = []
         c4z_files = []
+        # The items are iterated from the already-parsed manifest tree; only
+        # direct children of <Items> are considered, so an <Item> nested
+        # elsewhere in the document is never packaged.
         for item_xml_element in item_xml_elements:
             # VERIFY THE ITEM XML IS VALID.
-            # It should have the appropriate tag.
-            item_xml_element_has_correct_tag: bool = (item_xml_element.tag == 'Item')
-            if not item_xml_element_has_correct_tag:
+            is_valid_item_xml: bool = (item_xml_element.tag == 'Item')
+            if not is_valid_item_xml:
                 self.Log(f"Invalid XML: Found tag '{item_xml_element.tag}', should be 'Item'")
                 continue
 
+            # The attribute proxy is fetched once per item; every .attrib access
+            # crosses into lxml's C layer, so repeated fetches add up on large manifests.
+            item_attributes = item_xml_element.attrib
+
             # VERIFY THE ITEM HAS MANDATORY ATTRIBUTES.
             # A type is required.
-            item_type = item_xml_element.attrib.get('type')
+            item_type = item_attributes.get('type')
             item_type_exists: bool = item_type is not None
             if not item_type_exists:
                 self.CleanupTemporaryLuaFile(root_directory_path)
                 raise Exception("DriverPackager: Invalid XML: Missing tag 'Item' subtag 'type'")
 
             # A name is required.
-            item_name = item_xml_element.attrib.get('name')
+            item_name = item_attributes.get('name')
             item_name_exists: bool = item_name is not None
             if not item_name_exists:
                 self.CleanupTemporaryLuaFile(root_directory_path)
@@ -345,8 +652,7 @@ class DriverPackager(object):
             # This is an optional attribute and needs to be converted from
             # an XML boolean to a Python boolean.
             # If optional item attribute 'exclude' is True, skip it
-            item_excluded: bool = True if item_xml_element.attrib.get(
-                'exclude') == str('true').lower() else False
+            item_excluded: bool = (item_attributes.get('exclude') == 'true')
             if item_excluded:
                 continue
 
@@ -360,12 +666,10 @@ class DriverPackager(object):
                     raise Exception(f"DriverPackager: Error, manifest 'dir' Item '{item_name}' does not exist.")
 
                 # CHECK IF THE DIRECTORY SHOULD BE RECURSED INTO.
-                recurse = True if item_xml_element.attrib.get(
-                    'recurse') == str('true').lower() else False
+                recurse: bool = (item_attributes.get('recurse') == 'true')
                 
                 # GET ANY OPTIONAL C4Z DIRECTORY.
-                c4z_directory = item_xml_element.attrib.get('c4zDir') if item_xml_element.attrib.get(
-                    'c4zDir') != None else ''
+                c4z_directory = item_attributes.get('c4zDir', '')
                 
                 # TRACK THE C4Z DIRECTORY ITEM.
                 c4z_directories.append(
@@ -393,15 +697,14 @@ class DriverPackager(object):
                     # TRACK THAT THE DRIVER XML WAS FOUND.
                     c4z_driver_xml_found = True
 
-                    # GET ANY ENCRYPTED SCRIPT FILENAME.
-                    c4z_script_file = self.GetEncryptFilename(item_filepath)
-
-                    # READ THE DRIVER.XML TO DETERMINE IF THE 'TEXTFILE' ATTRIBUTE EXISTS.
-                    driver_xml_tree = etree.parse(item_filepath)
+                    # PARSE THE DRIVER XML AND GET ANY ENCRYPTED SCRIPT FILENAME.
+                    # The parsed tree comes back with the filename so all inspection
+                    # and mutation below reuses it rather than re-parsing the file.
+                    c4z_script_file, driver_xml_tree = self.GetEncryptFilename(item_filepath)
                     driver_xml_root_element = driver_xml_tree.getroot()
 
                     # The 'textfile' attribute will be under any documentation elements.
-                    documentation_xml_elements = driver_xml_root_element.findall('./config/documentation')
+                    documentation_xml_elements = _CONFIG_DOCUMENTATION_XPATH(driver_xml_root_element)
                     documentation_xml_elements_exist: bool = len(documentation_xml_elements) > 0
 
                     if not documentation_xml_elements_exist:
@@ -409,7 +712,8 @@ class DriverPackager(object):
                         pass
                     else:
                         # LOOK FOR A 'TEXTFILE' ATTRIBUTE IN THE FIRST DOCUMENTATION ELEMENT.
-                        first_documentation_xml_element = driver_xml_root_element.find('./config/documentation')
+                        FIRST_DOCUMENTATION_ELEMENT_INDEX: int = 0
+                        first_documentation_xml_element = documentation_xml_elements[FIRST_DOCUMENTATION_ELEMENT_INDEX]
                         textfile_attribute_exists_in_documentation_element: bool = 'textfile' in first_documentation_xml_element.attrib
                         if textfile_attribute_exists_in_documentation_element:
                             # GET THE TEXTFILE IN THE DOCUMENTATION ELEMENT.
@@ -428,27 +732,29 @@ class DriverPackager(object):
 
                             # READ THE CONTENTS OF THE FILE REFERENCE IN THE ABOVE 'TEXTFILE' ATTRIBUTE.
                             # It will ultimately be written to the inner-text of the <documentation> element.
+                            # A single read is used rather than probing for existence first;
+                            # a missing file surfaces as an OSError from the read itself.
                             textfile_path: str = os.path.join(root_directory_path, textfile)
                             try:
-                                codecs.open(textfile_path, 'r')
-                            except Exception as exception:
+                                with open(textfile_path, 'r', encoding='utf-8') as textfile:
+                                    textfile_contents: str = textfile.read()
+                            except OSError:
                                 self.Log("Unable to find the file " + "'" + textfile + "'" +
                                          " referenced in the 'textfile' attribute of the '<documentation>' element in your driver.xml")
-                            finally:
-                                textfile_contents = codecs.open(textfile_path, 'r')
-                                textfile_lines = textfile_contents.readlines()
-                                textfile_contents.close()
-                               
+                                textfile_contents = ''
+
                             # REMOVE THE DOCUMENTATION ELEMENTS FOR THE DRIVER XML.
-                            # They will be recreated later below.
-                            for documentation_element in documentation_xml_elements:
-                                config.remove(documentation_element)
+                            # They will be recreated later below.  strip_elements
+                            # removes all of them in a single C-level pass rather
+                            # than one remove call per element.
+                            etree.strip_elements(driver_xml_root_element, 'documentation', with_tail=False)
+                            FIRST_CONFIG_ELEMENT_INDEX: int = 0
+                            config_xml_element = _CONFIG_XPATH(driver_xml_root_element)[FIRST_CONFIG_ELEMENT_INDEX]
 
                             # CREATE A NEW DOCUMENTATION ELEMENT WITH THE TEXTFILE CONTENTS.
                             # The contents of the 'textfile' go in the innertext of the '<documentation>' element in the driver.xml.
-                            config_xml_element = driver_xml_tree.find('config')
                             new_documentation_xml_element = etree.SubElement(config_xml_element, 'documentation')
-                            new_documentation_xml_element.text = ''.join(textfile_lines)
+                            new_documentation_xml_element.text = textfile_contents
 
                             # SET DOCUMENTATION FILES FOR C4Z DRIVERS.
                             is_c4z_driver: bool = driver_type == "c4z"
@@ -465,43 +771,51 @@ class DriverPackager(object):
                             pass
 
                     # SQUISH LUA SOURCE IF THE MANIFEST AND DRIVER.XML AGREE.
-                    if squishLua:
+                    if squish_lua:
                         self.Squish(root_directory_path)
 
                     # ENSURE C4I DRIVERS ARE BEING BUILT WITH SQUISHED LUA.
-                    building_c4i_driver_without_squish_lua: bool = (c4i and not squishLua)
+                    building_c4i_driver_without_squish_lua: bool = (c4i and not squish_lua)
                     if building_c4i_driver_without_squish_lua:
                         self.CleanupTemporaryLuaFile(root_directory_path)
                         raise Exception(
                             "You are attempting to build a driver of type 'c4i', but 'squishLua' is set to false in the project file/manifest.  This needs to be set to true.")
 
                 # GET ANY OPTIONAL C4Z DIRECTORY.
-                c4z_directory = item_xml_element.attrib.get('c4zDir') if item_xml_element.attrib.get(
-                    'c4zDir') != None else ''
+                c4z_directory = item_attributes.get('c4zDir', '')
                 is_driver_xml_item_for_non_c4i_driver: bool = (item_name == "driver.xml" and not c4i)
                 if is_driver_xml_item_for_non_c4i_driver:
                     pass
                 else:
                     # TRACK THE ITEM AS BEING FOR C4Z FILES.
-                    c4z_files.append({'c4zDir': c4z_directory, 'name': item_name})
+                    # The compression hint lets compressLists skip deflate for
+                    # entries whose content is already compressed.
+                    c4z_files.append({
+                        'c4zDir': c4z_directory,
+                        'name': item_name,
+                        'compress_type': _GetZipCompressionTypeForFile(item_name)})
 
         # MAKE SURE THE DRIVER XML WAS FOUND.
         if not c4z_driver_xml_found:
             raise Exception("DriverPackager: Error, manifest 'file' Item 'driver.xml' was not found.")
 
         # UPDATE THE DRIVER XML.
-        driver_xml_filepath: str = os.path.join(root_directory_path, "driver.xml")
-        self.UpdateDriverXml(driver_xml_filepath)
+        # The tree parsed while processing the driver.xml item is reused rather than re-parsing the file.
+        self.UpdateDriverXml(driver_xml_tree)
 
         # COMPRESS C4Z DRIVER ITEMS.
         destination_c4z_filepath: str = os.path.join(self.destination_directory_path, c4z_name)
         c4z_compression_succeeded: bool = c4z.compressLists(
-            destination_c4z_filepath, 
-            root_directory_path, 
-            c4z_directories, 
-            c4z_files, 
-            c4z_script_file, 
-            xmlByteOverride=self.bytes_io.getvalue())
+            destination_c4z_filepath,
+            root_directory_path,
+            c4z_directories,
+            c4z_files,
+            c4z_script_file,
+            compressLevel=self.compress_level,
+            # getbuffer hands over a zero-copy view of the staged driver XML;
+            # getvalue would duplicate the whole buffer as a new bytes object.
+            # C4I builds have no staging buffer and serialize later from the tree.
+            xmlByteOverride=self.bytes_io.getbuffer() if self.bytes_io is not None else None)
         if not c4z_compression_succeeded:
             raise Exception(f"DriverPackager: Building {c4z_name} failed.")
 
@@ -516,33 +830,35 @@ class DriverPackager(object):
             os.remove(os.path.join(self.destination_directory_path, c4z_name))
 
             # FIND THE TEMPORARY DIRECTORY CONTAINING THE NEEDED DRIVER.XML AND DRIVER.LUA.SQUISHED.
+            # The system temporary directory can hold thousands of entries from other
+            # processes, so scandir is used (its entries carry cached type information,
+            # avoiding a stat call per entry) and the scan stops at the first match.
             source_temporary_directory_path = None
             root_temporary_directory_path = tempfile.gettempdir()
-            SUBDIRECTORY_NAMES_INDEX = 1
-            temporary_subdirectorie_names = next(os.walk(root_temporary_directory_path))[SUBDIRECTORY_NAMES_INDEX]
-            for temporary_subdirectory_name in temporary_subdirectorie_names:
-                # CHECK IF THE TEMPORARY DIRECTORY IS THE ONE CREATED FOR SQUISHING LUA.
-                is_squished_lua_directory: bool = temporary_subdirectory_name.startswith("Squished_Lua_")
-                if is_squished_lua_directory:
-                    source_temporary_directory_path  = os.path.join(root_temporary_directory_path, temporary_subdirectory_name)
+            with os.scandir(root_temporary_directory_path) as temporary_directory_entries:
+                for temporary_directory_entry in temporary_directory_entries:
+                    # CHECK IF THE TEMPORARY DIRECTORY IS THE ONE CREATED FOR SQUISHING LUA.
+                    is_squished_lua_directory: bool = (
+                        temporary_directory_entry.name.startswith("Squished_Lua_")
+                        and temporary_directory_entry.is_dir(follow_symlinks=False))
+                    if is_squished_lua_directory:
+                        source_temporary_directory_path = temporary_directory_entry.path
+                        break
 
             # If source path wasn't found, then the temp directory was not created because encryption was detected in the driver.xml (see build_c4z.py).
             source_temporary_directory_found: bool = source_temporary_directory_path is not None
             if not source_temporary_directory_found:
                 raise Exception("Encryption was detected in the driver.xml.  When building drivers of type 'c4i', encryption must be disabled.  Please remove the attribute and value of encryption='2' from the <script> element in the driver.xml")
 
-            # UPDATE THE DRIVER.XML.
-            driver_xml_filepath: str = os.path.join(self.source_directory_path, "driver.xml")
-            self.UpdateDriverXml(driver_xml_filepath)
-
             # REMOVE ANY <script> SECTIONS IN THE DRIVER.XML.
-            driver_xml_tree = etree.parse(driver_xml_filepath)
+            # The driver XML tree was already parsed and updated above, so it is reused here.
             driver_xml_root_element = driver_xml_tree.getroot()
-            script_xml_element = driver_xml_root_element.findall('./config/script')
+            script_xml_element = _CONFIG_SCRIPT_XPATH(driver_xml_root_element)
             script_xml_element_exists: bool = script_xml_element is not None
             if script_xml_element_exists:
                 # REMOVE ALL SCRIPT ELEMENTS UNDER THE CONFIG ELEMENT.
-                config_xml_element = driver_xml_root_element.find('config')
+                FIRST_CONFIG_ELEMENT_INDEX: int = 0
+                config_xml_element = _CONFIG_XPATH(driver_xml_root_element)[FIRST_CONFIG_ELEMENT_INDEX]
                 for script_xml_element in config_xml_element.findall('script'):
                     config_xml_element.remove(script_xml_element)
 
@@ -551,21 +867,29 @@ class DriverPackager(object):
             driver_xml_tree.write(driver_2_xml_filepath)
 
             # GET THE SQUISHED LUA FILE CONTENTS.
-            squished_lua_driver_filepath: str = os.path.join(self.source_directory_path, "driver.lua.squished")
-            squished_lua_driver_file = codecs.open(squished_lua_driver_filepath, 'r', encoding='utf-8')
-            squished_lua_driver_file_lines = squished_lua_driver_file.readlines()
-            squished_lua_driver_file.close()
+            # The whole file is read in a single pass; reading line by line would
+            # allocate a throwaway string per line only to rejoin them below.
+            squished_lua_driver_filepath: str = self._source_directory_join("driver.lua.squished")
+            with open(squished_lua_driver_filepath, 'rb') as squished_lua_driver_file:
+                squished_lua_driver_content: str = squished_lua_driver_file.read().decode('utf-8')
 
             # ADD THE SQUISHED LUA TO THE <script> SECTION OF THE DRIVER.
             # It must be wrapped in <CDATA> tags.
-            driver_2_xml_tree = etree.parse(driver_2_xml_filepath)
-            driver_2_config_xml_element = driver_2_xml_tree.find('config')
+            driver_2_xml_tree = etree.parse(driver_2_xml_filepath, self._xml_parser)
+            FIRST_CONFIG_ELEMENT_INDEX: int = 0
+            driver_2_config_xml_element = _CONFIG_XPATH(driver_2_xml_tree)[FIRST_CONFIG_ELEMENT_INDEX]
             driver_2_script_element = etree.SubElement(driver_2_config_xml_element, 'script')
-            driver_2_script_element.text = etree.CDATA(''.join(squished_lua_driver_file_lines))
+            driver_2_script_element.text = etree.CDATA(squished_lua_driver_content)
 
             # WRITE OUT THE FINAL C4I DOCUMENT.
+            # Recomputing indentation across the whole tree is skipped unless
+            # pretty output was explicitly requested for diagnostics.
             destination_c4i_filepath: str = os.path.join(self.destination_directory_path, c4z_name)
-            driver_2_xml_tree.write(destination_c4i_filepath, pretty_print=True)
+            driver_2_xml_tree.write(
+                destination_c4i_filepath,
+                pretty_print=self.pretty_print,
+                xml_declaration=True,
+                encoding='UTF-8')
 
         else:
             # UNZIP THE C4Z DRIVER IN THE DESTINATION DIRECTORY IF ENABLED.
@@ -577,70 +901,124 @@ class DriverPackager(object):
                 extracted_driver_destination_folder_path: str = os.path.splitext(driver_destination_filepath)[PATH_BEFORE_FILE_EXTENSION_INDEX]
 
                 # ENSURE A CLEAN DIRECTORY EXISTS FOR EXTRACTING THE DRIVER.
-                driver_extraction_directory_exists: bool = os.path.exists(extracted_driver_destination_folder_path)
-                if driver_extraction_directory_exists:
-                    shutil.rmtree(extracted_driver_destination_folder_path)
-                    
+                # rmtree handles a missing directory itself, so no existence
+                # check (and its extra stat call) is needed beforehand.
+                shutil.rmtree(extracted_driver_destination_folder_path, ignore_errors=True)
+
                 # EXTRACT THE DRIVER TO THE DESTINATION DIRECTORY.
+                # Entries are copied manually rather than via extractall, whose
+                # default 16 KiB buffer makes many small Python-level read/write
+                # round trips on multi-megabyte archives.
+                EXTRACTION_COPY_BUFFER_SIZE_IN_BYTES: int = 1024 * 1024
                 with zipfile.ZipFile(driver_destination_filepath, "r") as driver_zip_file:
-                    driver_zip_file.extractall(extracted_driver_destination_folder_path)
+                    # CREATE ALL DIRECTORIES UP FRONT.
+                    # With the directory tree in place, the file entries can be
+                    # extracted in any order (and therefore in parallel).
+                    file_entry_extraction_tasks: list[tuple[Any, str]] = []
+                    for zip_entry_info in driver_zip_file.infolist():
+                        # SANITIZE THE ENTRY NAME LIKE EXTRACTALL WOULD.
+                        # Absolute paths and parent-directory components in a
+                        # member name could otherwise write outside the
+                        # destination folder.
+                        entry_name: str = zip_entry_info.filename.replace('\\', '/').lstrip('/')
+                        entry_name_escapes_destination: bool = '..' in entry_name.split('/')
+                        if entry_name_escapes_destination:
+                            self.Log(f"Skipping unsafe archive entry: {zip_entry_info.filename}")
+                            continue
+
+                        extracted_entry_path: str = os.path.join(
+                            extracted_driver_destination_folder_path, entry_name)
+                        if zip_entry_info.is_dir():
+                            os.makedirs(extracted_entry_path, exist_ok=True)
+                            continue
+                        os.makedirs(os.path.dirname(extracted_entry_path), exist_ok=True)
+                        file_entry_extraction_tasks.append((zip_entry_info, extracted_entry_path))
+
+                    # STREAM-COPY THE FILE ENTRIES ACROSS A THREAD POOL.
+                    # ZipFile serializes access to the underlying archive with an
+                    # internal lock, but decompression and the buffered writes
+                    # release the GIL, so archives with many entries extract
+                    # noticeably faster across a handful of threads.
+                    def ExtractZipFileEntry(file_entry_extraction_task: tuple[Any, str]) -> None:
+                        zip_entry_info, extracted_entry_path = file_entry_extraction_task
+                        with driver_zip_file.open(zip_entry_info) as compressed_entry_file, \
+                                open(extracted_entry_path, "wb") as extracted_entry_file:
+                            shutil.copyfileobj(
+                                compressed_entry_file,
+                                extracted_entry_file,
+                                EXTRACTION_COPY_BUFFER_SIZE_IN_BYTES)
+
+                        # RESTORE ANY UNIX PERMISSION BITS, AS EXTRACTALL DOES.
+                        # Archives built on Windows store no mode, leaving the
+                        # bits zero, in which case the OS default applies.
+                        EXTERNAL_ATTRIBUTES_UNIX_MODE_SHIFT: int = 16
+                        entry_permission_bits: int = (
+                            zip_entry_info.external_attr >> EXTERNAL_ATTRIBUTES_UNIX_MODE_SHIFT) & 0o777
+                        if entry_permission_bits:
+                            os.chmod(extracted_entry_path, entry_permission_bits)
+
+                    EXTRACTION_THREAD_COUNT: int = 8
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=EXTRACTION_THREAD_COUNT) as extraction_thread_pool:
+                        # Draining the map iterator re-raises the first extraction
+                        # error (if any) on this thread.
+                        for unused_extraction_result in extraction_thread_pool.map(
+                                ExtractZipFileEntry, file_entry_extraction_tasks):
+                            pass
 
         # EXECUTE ANY POSTPACKAGING COMMANDS.
-        postpackage_command_xml_elements = xml_root_element.find('PostpackageCommands')
-        postpackage_commands_exist: bool = postpackage_command_xml_elements is not None
-        if postpackage_commands_exist:
-            # EXECUTE EACH POSTPACKAGING COMMAND.
-            for postpackage_command_xml_element in postpackage_command_xml_elements:
-                # VERIFY THE COMMAND XML IS VALID.
-                print(postpackage_command_xml_element.tag, postpackage_command_xml_element.text)
-                is_valid_postpackage_command_xml: bool = (postpackage_command_xml_element.tag == 'PostpackageCommand')
-                if is_valid_postpackage_command_xml:
-                    self.Log(f"Invalid XML: Found tag '{postpackage_command_xml_element.tag}', should be 'PostpackageCommand'")
-                    continue
-
-                # EXCEUTE THE POSTPACKAGING COMMAND.
-                # Commands should use the correct path separator for the current OS.
-                postpackage_command: str = postpackage_command_xml_element.text.replace("\\", os.path.sep)
-                postpackage_command = postpackage_command.replace("/", os.path.sep)
-                SUCCESS_RETURN_CODE: int = 0
-                postpackage_command_return_code: int = os.system(postpackage_command)
-                postpackage_command_succeeded: bool = (postpackage_command_return_code == SUCCESS_RETURN_CODE)
-                if postpackage_command_succeeded:
-                    print("Failed to execute postpackage command.")
+        # The compiled XPath walks straight to the command text nodes in lxml's
+        # C core; elements with unexpected tags are simply never selected, so no
+        # per-element Python tag check is needed.
+        for postpackage_command_text in _POSTPACKAGE_COMMAND_TEXT_XPATH(xml_root_element):
+            # EXCEUTE THE POSTPACKAGING COMMAND.
+            # Commands should use the correct path separator for the current OS.
+            # Any trailing whitespace from the XML text node is stripped as well.
+            postpackage_command: str = str(postpackage_command_text).translate(
+                _PATH_SEPARATOR_TRANSLATION_TABLE).rstrip()
+            # The command is run directly rather than through os.system, which
+            # would spawn an intermediate shell for every command.
+            postpackage_command_arguments: list[str] = shlex.split(postpackage_command, posix=(os.name != 'nt'))
+            completed_postpackage_command = subprocess.run(postpackage_command_arguments, check=False)
+            SUCCESS_RETURN_CODE: int = 0
+            postpackage_command_succeeded: bool = (completed_postpackage_command.returncode == SUCCESS_RETURN_CODE)
+            if not postpackage_command_succeeded:
+                print("Failed to execute postpackage command.")
 
     ## Updates the driver XML.
-    ## \param[in]   driver_xml_filepath - Path to the driver XML file to update.
+    ## \param[in]   driver_xml_tree - The parsed driver XML tree to update in place.
     ## \throws  Exception - If an error occurs.
-    def UpdateDriverXml(self, driver_xml_filepath: str):
+    def UpdateDriverXml(self, driver_xml_tree):
         try:
-            # GET THE ROOT ELEMENT OF THE DRIVER XML FILE.
-            driver_xml_tree = etree.parse(driver_xml_filepath)
+            # GET THE ROOT ELEMENT OF THE DRIVER XML TREE.
             driver_xml_root_element = driver_xml_tree.getroot()
 
             # UPDATE THE MODIFIED DATE IF APPLICABLE.
             if self.update_modified:
                 # ENSURE THE DATE MODIFIED ELEMENT EXISTS.
-                date_modified_xml_element = driver_xml_root_element.find("modified")
-                date_modified_xml_element_exists: bool = dateModified is not None
-                if date_modified_xml_element_exists:
+                date_modified_xml_elements = _MODIFIED_XPATH(driver_xml_root_element)
+                date_modified_xml_element_exists: bool = len(date_modified_xml_elements) > 0
+                if not date_modified_xml_element_exists:
                     raise Exception("<modified> tag not found")
+                FIRST_DATE_MODIFIED_ELEMENT_INDEX: int = 0
+                date_modified_xml_element = date_modified_xml_elements[FIRST_DATE_MODIFIED_ELEMENT_INDEX]
 
                 # UPDATE THE DATE MODIFIED ELEMENT WITH THE CURRENT TIMESTAMP.
-                timestamp = datetime.datetime.now()
-                timestamp = timestamp.strftime("%m/%d/%Y %I:%M %p")
+                timestamp: str = time.strftime("%m/%d/%Y %I:%M %p")
                 date_modified_xml_element.text = timestamp
                 self.Log(f"Build timestamp {timestamp}")
 
             # UPDATE THE DRIVER VERSION IF APPLICABLE.
             if self.driver_version:
                 # ENSURE THE DRIVER VERSION ELEMENT EXISTS.
-                driver_version_xml_element = driver_xml_root_element.find("version")
-                driver_version_xml_element_exists: bool = driver_version_xml_element is not None
+                driver_version_xml_elements = _VERSION_XPATH(driver_xml_root_element)
+                driver_version_xml_element_exists: bool = len(driver_version_xml_elements) > 0
                 if not driver_version_xml_element_exists:
                     raise Exception("<version> tag not found")
+                FIRST_DRIVER_VERSION_ELEMENT_INDEX: int = 0
+                driver_version_xml_element = driver_version_xml_elements[FIRST_DRIVER_VERSION_ELEMENT_INDEX]
 
                 # MAKE SURE THERE IS AN OLD VERSION TO UPDATE.
-                old_version = driverVersion.text
+                old_version = driver_version_xml_element.text
                 old_version_exists: bool = old_version is not None
                 if not old_version_exists:
                     raise Exception("empty <version> tag")
@@ -648,8 +1026,19 @@ class DriverPackager(object):
                 # UPDATE THE DRIVER VERSION IN TH XML.
                 driver_version_xml_element.text = self.driver_version
 
-            # WRITE THE UPDATED XML.
-            driver_xml_tree.write(self.bytes_io, encoding='UTF-8', xml_declaration=False)
+            # WRITE THE UPDATED XML INTO THE STAGING BUFFER.
+            # The buffer is reused across builds, so it is rewound and truncated
+            # first; repeated serializations would otherwise append after stale
+            # bytes and keep regrowing the buffer. Reuse also means the buffer's
+            # backing allocation is already sized from the previous build.
+            # C4I builds have no staging buffer and serialize later from the tree.
+            if self.bytes_io is not None:
+                self.bytes_io.seek(0)
+                self.bytes_io.truncate()
+                # tostring serializes into one C-level allocation, so the buffer
+                # receives a single large write instead of the many small writes
+                # tree.write makes through the file-object protocol.
+                self.bytes_io.write(etree.tostring(driver_xml_tree, encoding='UTF-8', xml_declaration=False))
         except Exception as exception:
             self.Log(exception)
             raise Exception("Unable to update driver.xml")
@@ -661,29 +1050,33 @@ class DriverPackager(object):
         manifest_explicitly_specified: bool = self.manifest_xml_filename is not None
         if manifest_explicitly_specified:
             self.Log(f"Building driver from manifest {self.manifest_xml_filename}...")
-            manifest_xml_filepath: str = os.path.join(self.source_directory_path, self.manifest_xml_filename)
+            manifest_xml_filepath: str = self._source_directory_join(self.manifest_xml_filename)
             return_code: int = self.CreateFromManifest(manifest_xml_filepath)
             return return_code
 
         # SEARCH FOR A MANIFEST IN THE SOURCE DIRECTORY (.c4zproj).
+        # The extension filter runs inside glob's C-level fnmatch, so Python only
+        # ever loops over the (typically zero or one) project file candidates
+        # instead of every directory entry.  The source directory name is
+        # invariant and only split once, outside the loop.
         manifest_path_from_source_directory: Optional[str] = None
-        source_directory_entries: list[str] = os.listdir(self.source_directory_path)
-        for filename in source_directory_entries:
-            # CHECK IF THE FILE IS FOR A C4Z PROJECT FILE.
-            filename_without_extension, file_extension = os.path.splitext(filename)
-            is_c4z_project_file: bool = (file_extension == ".c4zproj")
-            if is_c4z_project_file:
-                # CHECK IF THE PARENT DIRECTORY PATH MATCHES THE PROJECT NAME.
-                source_directory_parent_path, source_directory_name = os.path.split(self.source_directory_path)
-                source_directory_name_matches_project_name: bool = (source_directory_name == filename_without_extension)
-                if source_directory_name_matches_project_name:
-                    # USE THIS PROJECT FILE AS THE MANIFEST.
-                    manifest_path_from_source_directory = os.path.join(self.source_directory_path, filename)
-                    break
+        manifest_filename: Optional[str] = None
+        unused_source_directory_parent_path, source_directory_name = os.path.split(self.source_directory_path)
+        c4z_project_filepaths: list[str] = glob.glob(self._source_directory_join("*.c4zproj"))
+        for c4z_project_filepath in c4z_project_filepaths:
+            # CHECK IF THE PARENT DIRECTORY PATH MATCHES THE PROJECT NAME.
+            c4z_project_filename: str = os.path.basename(c4z_project_filepath)
+            filename_without_extension, unused_file_extension = os.path.splitext(c4z_project_filename)
+            source_directory_name_matches_project_name: bool = (source_directory_name == filename_without_extension)
+            if source_directory_name_matches_project_name:
+                # USE THIS PROJECT FILE AS THE MANIFEST.
+                manifest_path_from_source_directory = c4z_project_filepath
+                manifest_filename = c4z_project_filename
+                break
 
         # BUILD THE C4Z DRIVER FROM THE PROJECT MANIFEST IF FOUND.
         if manifest_path_from_source_directory:
-            self.Log(f"Building driver from manifest {filename}...")
+            self.Log(f"Building driver from manifest {manifest_filename}...")
             return_code: int = self.CreateFromManifest(manifest_path_from_source_directory)
             return return_code
 
@@ -694,20 +1087,19 @@ class DriverPackager(object):
         # CONFIGURE LUA SQUISHING.
         # Lua squishing to a single file can only occur if an appropriate config file exists.
         squish_lua: bool = False
-        lua_squish_config_filepath: str = self.source_directory_path + os.path.sep + "squishy"
+        lua_squish_config_filepath: str = self._source_directory_join("squishy")
         lua_squish_config_file_exists: bool = os.path.isfile(lua_squish_config_filepath)
         if lua_squish_config_file_exists:
             squish_lua = True
         c4z.setSquishLua(squish_lua)
 
         # PROVIDE VISIBILITY INTO BUILDING THE DRIVER FROM A DIRECTORY.
-        source_directory_absolute_path: str = os.path.abspath(self.source_directory_path)
-        self.Log(f"Building driver from directory {source_directory_absolute_path}...")
+        self.Log(f"Building driver from directory {self.source_directory_absolute_path}...")
 
         # DETERMINE C4Z FILENAMES.
         c4z_filename: str = os.path.basename(self.source_directory_path) + ".c4z"
-        c4z_script_filename: str = self.GetEncryptFilename(
-            os.path.join(self.source_directory_path, "driver.xml"))
+        c4z_script_filename, unused_driver_xml_tree = self.GetEncryptFilename(
+            self._source_directory_join("driver.xml"))
 
         # SQUISH LUA FILES INTO A SINGLE FILE IF APPLICABLE.
         if squish_lua:
@@ -719,7 +1111,10 @@ class DriverPackager(object):
             destination_c4z_filepath,
             self.source_directory_path,
             c4z_script_filename,
-            xmlByteOverride=self.bytes_io.getvalue())
+            compressLevel=self.compress_level,
+            # getbuffer hands over a zero-copy view of the staged driver XML
+            # rather than getvalue's full bytes copy.
+            xmlByteOverride=self.bytes_io.getbuffer())
 
         # INDICATE THAT CREATING THE DRIVER SUCCEEDED.
         SUCCESS_RETURN_CODE: int = 0
@@ -730,23 +1125,80 @@ class DriverPackager(object):
     #       but may be any object (like an exception) convertible to a string.
     def Log(self, line: Any):
         # LOG ONLY IF VERBOSE OUTPUT IS ENABLED.
-        if self.verbose:
-            # A timestamp provides additional context to the message.
-            log_message_timestamp: str = datetime.datetime.now().strftime("%Y-%m-%d-%H:%M:%S")
-            print(f"{log_message_timestamp}: {line}")
-            # Flushing ensures the message will be printed immediately.
-            sys.stdout.flush()
-
+        # Returning before any formatting keeps discarded messages free when
+        # this is called from tight loops.
+        if not self.verbose:
+            return
+
+        # A timestamp provides additional context to the message.
+        # time.strftime skips the timezone handling datetime.now pays for.
+        log_message_timestamp: str = time.strftime("%Y-%m-%d-%H:%M:%S")
+        print(f"{log_message_timestamp}: {line}")
+        # Flushing ensures the message will be printed immediately.
+        sys.stdout.flush()
+
+
+## Builds a single driver from a manifest in a worker process.
+## This must be a module-level function so it can be pickled for the process pool.
+## \param[in]   build_task - A (arguments, manifest_xml_filepath) tuple describing the build.
+## \return  A return code from trying to create the driver package.
+##      0 indicates success; any other value indicates failure.
+def _BuildDriverFromManifest(build_task: tuple) -> int:
+    # BUILD THE DRIVER WITH A PACKAGER LOCAL TO THIS WORKER.
+    arguments, manifest_xml_filepath = build_task
+    driver_packager = DriverPackager(arguments)
+    return driver_packager.CreateFromManifest(manifest_xml_filepath)
+
+
+## Determines whether a manifest describes a c4i driver.
+## The c4i path locates its squished Lua by scanning the shared system temp
+## directory for the first Squished_Lua_ entry, so two c4i builds running
+## concurrently could each pick up the other's working data and package the
+## wrong driver's Lua.  Builds identified here must be dispatched sequentially.
+## \param[in]   manifest_xml_filepath - Path to the manifest file to inspect.
+## \return  True if the manifest's Driver element has type 'c4i'; False
+##      otherwise, including when the manifest is missing or invalid - the
+##      build itself reports those errors.
+def _ManifestIsForC4iDriver(manifest_xml_filepath: str) -> bool:
+    try:
+        # Only the root Driver element's attributes are needed, so parsing
+        # stops at its start event rather than reading the whole manifest.
+        for unused_event, driver_xml_element in etree.iterparse(
+                manifest_xml_filepath, events=('start',), tag='Driver'):
+            return driver_xml_element.attrib.get('type') == 'c4i'
+    except (OSError, etree.XMLSyntaxError):
+        pass
+    return False
+
+
+## Determines whether a source directory will build from a c4i manifest.
+## \param[in]   source_directory_path - Path of the driver source directory.
+## \param[in]   manifest_xml_filename - Optional explicit manifest filename;
+##      when absent, any .c4zproj file in the directory is inspected.
+## \return  True if a manifest in the directory describes a c4i driver; False if not.
+def _SourceDirectoryHasC4iManifest(source_directory_path: str, manifest_xml_filename: Optional[str]) -> bool:
+    manifest_explicitly_specified: bool = manifest_xml_filename is not None
+    if manifest_explicitly_specified:
+        return _ManifestIsForC4iDriver(os.path.join(source_directory_path, manifest_xml_filename))
+
+    for c4z_project_filepath in glob.glob(os.path.join(source_directory_path, "*.c4zproj")):
+        if _ManifestIsForC4iDriver(c4z_project_filepath):
+            return True
+    return False
+
+
+## Parses command line arguments for the driver packager.
+## \return  The parsed command line arguments.
+def ParseCommandLineArguments() -> argparse.Namespace:
+    import argparse
 
-## Creates a driver packager based on command line arguments.
-## \return  An appropriately configured driver packager.
-def CreateDriverPackagerFromCommandLineArguments() -> DriverPackager:
     # PARSE COMMAND LINE ARGUMENTS.
     command_line_argument_parser = argparse.ArgumentParser()
     command_line_argument_parser.add_argument("-v", "--verbose", action="store_true",
                         help="Enable verbose.")
     command_line_argument_parser.add_argument("source_directory_path",
-                        help="Directory where c4z source files are located.")
+                        help="Directory where c4z source files are located.  May be a "
+                             "glob pattern matching several driver source directories.")
     command_line_argument_parser.add_argument("destination_directory_path",
                         help="Directory where c4z files are placed.")
     command_line_argument_parser.add_argument("manifest_xml_filename",
@@ -758,17 +1210,98 @@ def CreateDriverPackagerFromCommandLineArguments() -> DriverPackager:
                         help="[optional] Allow Execute in Lua Command window.")
     command_line_argument_parser.add_argument("--update-modified", action="store_true",
                         help="[optional] Update driver modified date.")
+    command_line_argument_parser.add_argument("--pretty", action="store_true",
+                        help="[optional] Pretty-print the final c4i document (diagnostic only).")
+    command_line_argument_parser.add_argument("--compress-level", type=int, choices=range(0, 10),
+                        help="[optional] DEFLATE level for the c4z (default 1 with --unzip, 6 otherwise).")
     command_line_argument_parser.add_argument("--driver-version", nargs=1,
                         help="[optional] Update driver version to next argument.")
     command_line_arguments: argparse.Namespace = command_line_argument_parser.parse_args()
-
-    # RETURN A DRIVER PACKAGER CONFIGURED ACCORDING TO THE COMMAND LINE ARGUMENTS.
-    driver_packager = DriverPackager(command_line_arguments)
-    return driver_packager
+    return command_line_arguments
+
+
+## Builds a single driver source directory in a worker process.
+## This must be a module-level function so it can be pickled for the process pool.
+## \param[in]   build_task - A (arguments, source_directory_path) tuple describing the build.
+## \return  The build's return code (0 = success, other values = failure).
+def _BuildDriverFromSourceDirectory(build_task: tuple) -> int:
+    import argparse
+
+    # BUILD THE DRIVER WITH A PACKAGER LOCAL TO THIS WORKER.
+    # The shared arguments are copied so each worker sees its own source directory.
+    arguments, source_directory_path = build_task
+    worker_arguments = argparse.Namespace(**vars(arguments))
+    worker_arguments.source_directory_path = source_directory_path
+    driver_packager = DriverPackager(worker_arguments)
+    return driver_packager.Run()
+
+
+## Runs the driver packager over every source directory matching the command line.
+## \return  0 when every build succeeds; otherwise the first non-zero return code.
+def Main() -> int:
+    import concurrent.futures
+
+    command_line_arguments: argparse.Namespace = ParseCommandLineArguments()
+
+    # EXPAND ANY GLOB PATTERN IN THE SOURCE DIRECTORY ARGUMENT.
+    matched_source_directory_paths: list[str] = [
+        matched_path for matched_path in glob.glob(command_line_arguments.source_directory_path)
+        if os.path.isdir(matched_path)]
+
+    # BUILD A SINGLE DRIVER DIRECTLY IN THIS PROCESS.
+    # This also covers non-glob arguments that do not currently exist on disk,
+    # preserving the original error reporting for them.
+    building_multiple_drivers: bool = len(matched_source_directory_paths) > 1
+    if not building_multiple_drivers:
+        # A glob that matched exactly one directory must build that directory
+        # rather than the raw pattern string.  Zero matches keep the original
+        # argument so error reporting still names what the user typed.
+        glob_matched_single_directory: bool = len(matched_source_directory_paths) == 1
+        if glob_matched_single_directory:
+            SINGLE_MATCHED_DIRECTORY_INDEX: int = 0
+            command_line_arguments.source_directory_path = matched_source_directory_paths[
+                SINGLE_MATCHED_DIRECTORY_INDEX]
+        driver_packager = DriverPackager(command_line_arguments)
+        return driver_packager.Run()
+
+    # SEPARATE OUT C4I DRIVER DIRECTORIES, WHICH CANNOT BUILD CONCURRENTLY.
+    # The c4i path finds its squished Lua through the shared system temp
+    # directory, so concurrent c4i builds could pick up each other's working
+    # data.  They are built one at a time in this process instead.
+    parallel_source_directory_paths: list[str] = []
+    sequential_source_directory_paths: list[str] = []
+    for source_directory_path in matched_source_directory_paths:
+        directory_builds_c4i_driver: bool = _SourceDirectoryHasC4iManifest(
+            source_directory_path, command_line_arguments.manifest_xml_filename)
+        if directory_builds_c4i_driver:
+            sequential_source_directory_paths.append(source_directory_path)
+        else:
+            parallel_source_directory_paths.append(source_directory_path)
+
+    # BUILD EACH REMAINING DRIVER IN ITS OWN WORKER PROCESS.
+    # The builds are independent (distinct outputs, disjoint source trees), so
+    # the CPU-bound parsing and deflate work scales across cores.
+    return_codes: list[int] = []
+    if parallel_source_directory_paths:
+        build_tasks = [(command_line_arguments, source_directory_path)
+                       for source_directory_path in parallel_source_directory_paths]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return_codes.extend(executor.map(_BuildDriverFromSourceDirectory, build_tasks))
+
+    # BUILD THE C4I DRIVERS SEQUENTIALLY.
+    for source_directory_path in sequential_source_directory_paths:
+        return_codes.append(_BuildDriverFromSourceDirectory(
+            (command_line_arguments, source_directory_path)))
+
+    # AGGREGATE THE PER-DRIVER RETURN CODES INTO A SINGLE EXIT CODE.
+    SUCCESS_RETURN_CODE: int = 0
+    for return_code in return_codes:
+        build_failed: bool = (return_code != SUCCESS_RETURN_CODE)
+        if build_failed:
+            return return_code
+    return SUCCESS_RETURN_CODE
 
 
 # RUN THE DRIVER PACKAGER IF THIS FILE IS BEING RUN DIRECTLY.
 if __name__ == "__main__":
-    driver_packager: DriverPackager = CreateDriverPackagerFromCommandLineArguments()
-    return_code: int = driver_packager.Run()
-    sys.exit(return_code)
+    sys.exit(Main())